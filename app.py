@@ -3,14 +3,24 @@ S3 Upload and Delete Application
 """
 
 import os
+import asyncio
+import functools
+import hashlib
 import threading
-from typing import List, Optional, Tuple, Dict, Any
-from configparser import ConfigParser
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple, Dict, Any, Iterable, Iterator, Callable, Awaitable
+from configparser import ConfigParser, Error as ConfigParserError
+from http.client import HTTPConnection
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
 import boto3
-from botocore.exceptions import ClientError
+import urllib3.connection
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from s3transfer.subscribers import BaseSubscriber
 
 
 # ===== 定数定義 =====
@@ -39,7 +49,215 @@ class AppConstants:
     
     # S3設定
     MAX_KEYS_PER_PAGE = 25
-    DELETE_BATCH_SIZE = 100
+    LIST_PAGE_SIZE = 1000
+    DELETE_BATCH_SIZE = 1000  # S3の上限。上限の小さいS3互換ストレージではここを下げる
+    DELETE_MAX_WORKERS = 4
+    DELETE_MAX_DELAY_MS = 200
+    SINGLE_DELETE_MAX_KEYS = 8  # この件数以下はDeleteObjectsではなくDeleteObjectで個別に送信
+    MAX_ERRORS_SHOWN = 10
+    APP_MAX_WORKERS = 32  # S3操作用の共有スレッドプールのサイズ
+    TRANSFER_MAX_CONCURRENCY = 20
+    MULTIPART_THRESHOLD = 8 * 1024 * 1024
+    MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+    UPLOAD_QUEUE_SIZE = 1024
+    HEAD_CHECK_BATCH_SIZE = 64  # 変更確認のHEADリクエストをまとめて並列実行する件数
+    HASH_READ_SIZE = 1024 * 1024
+    MAX_POOL_CONNECTIONS = 64
+    MAX_RETRY_ATTEMPTS = 10
+    HTTP_BLOCKSIZE = 1024 * 1024  # HTTP送信時に一度に書き込むサイズ
+    LEGACY_REGIONS = {'EU': 'eu-west-1'}  # GetBucketLocationが返す旧形式のリージョン名
+    
+    # UI設定
+    PROGRESS_REFRESH_MS = 33  # 進捗表示の更新間隔（約30Hz）
+
+
+# ===== 転送完了通知 =====
+class _DoneSubscriber(BaseSubscriber):
+    """TransferManagerの転送完了時にコールバックを呼び出すサブスクライバー"""
+    
+    def __init__(self, callback: Callable[[Any], None]):
+        self._callback = callback
+    
+    def on_done(self, future, **kwargs):
+        self._callback(future)
+
+
+# ===== HTTP送信バッファ =====
+def _enlarge_http_blocksize(blocksize: int) -> None:
+    """
+    HTTP接続の送信バッファサイズを拡大
+    
+    既定の8KiB（urllib3 2.xでは16KiB）単位の書き込みでは、アップロード時の
+    write()呼び出しが多くなり、並列転送時にGILの取り合いでスループットが落ちる。
+    
+    Args:
+        blocksize: 新しいバッファサイズ（バイト）
+    """
+    HTTPConnection.__init__.__defaults__ = tuple(
+        blocksize if default == 8192 else default
+        for default in HTTPConnection.__init__.__defaults__
+    )
+    
+    # urllib3 2.xは自身の既定値をhttp.clientに明示的に渡す
+    kwdefaults = urllib3.connection.HTTPConnection.__init__.__kwdefaults__
+    if kwdefaults and 'blocksize' in kwdefaults:
+        kwdefaults['blocksize'] = blocksize
+
+
+# ===== 進捗カウンタ =====
+class ProgressCounter:
+    """ワーカースレッドから更新し、メインスレッドから定期的に読み取る進捗カウンタ"""
+    
+    def __init__(self, total: Optional[int] = None):
+        """
+        Args:
+            total: 総数（未確定の場合はNone）
+        """
+        self._lock = threading.Lock()
+        self._done = 0
+        self._total = total
+    
+    def add(self, count: int = 1) -> None:
+        """完了数を加算"""
+        with self._lock:
+            self._done += count
+    
+    def set_total(self, total: int) -> None:
+        """総数を確定"""
+        with self._lock:
+            self._total = total
+    
+    def snapshot(self) -> Tuple[int, Optional[int]]:
+        """(完了数, 総数)を取得"""
+        with self._lock:
+            return self._done, self._total
+
+
+# ===== 削除キーのバッファリング =====
+class DeleteAccumulator:
+    """
+    削除対象のキーを蓄積し、件数または待ち時間に応じてまとめて削除するクラス
+    
+    バッチの送信は同時実行数を制限したスレッドプールで行い、
+    実行中のバッチが上限に達している間はadd()がブロックする。
+    """
+    
+    def __init__(
+        self,
+        send_batch: Callable[[List[str]], Dict[str, Any]],
+        flush_threshold: int = AppConstants.DELETE_BATCH_SIZE,
+        max_inflight: int = AppConstants.DELETE_MAX_WORKERS,
+        max_delay_ms: int = AppConstants.DELETE_MAX_DELAY_MS,
+        on_batch_done: Optional[Callable[[List[str], Dict[str, Any]], None]] = None
+    ):
+        """
+        Args:
+            send_batch: 1バッチ分のキーを削除する関数
+            flush_threshold: 1バッチあたりの最大キー数
+            max_inflight: 同時に実行する削除リクエストの最大数
+            max_delay_ms: キーを保持しておく最大時間（ミリ秒）
+            on_batch_done: バッチ削除の完了時に呼ばれるコールバック
+        """
+        self._send_batch = send_batch
+        self._flush_threshold = flush_threshold
+        self._max_delay = max_delay_ms / 1000
+        self._on_batch_done = on_batch_done
+        
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        # 取り出し済みで投入が終わっていないバッチ群の数（close()はこれが0になるまで待つ）
+        self._submitting = 0
+        self._submitted = threading.Condition(self._lock)
+        self._timer: Optional[threading.Timer] = None
+        self._inflight = threading.BoundedSemaphore(max_inflight)
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight)
+        self._futures = []
+    
+    def __enter__(self) -> "DeleteAccumulator":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def add(self, keys: Iterable[str]) -> None:
+        """削除するキーを追加（閾値に達した分はすぐに送信、空のキーは無視）"""
+        with self._lock:
+            self._pending.extend(key for key in keys if key)
+            batches = self._take_batches(force=False)
+            if self._pending and self._timer is None:
+                self._timer = threading.Timer(self._max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        
+        self._submit_all(batches)
+    
+    def flush(self) -> None:
+        """蓄積されているキーをすべて送信"""
+        with self._lock:
+            timer, self._timer = self._timer, None
+            batches = self._take_batches(force=True)
+        
+        if timer is not None and timer is not threading.current_thread():
+            timer.cancel()
+            timer.join()
+        
+        self._submit_all(batches)
+    
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        残りのキーを送信し、すべての削除が終わるまで待機
+        
+        Returns:
+            各バッチのレスポンスのリスト
+        """
+        self.flush()
+        try:
+            # タイマーのスレッドが投入中のバッチがあれば、その投入を待つ
+            with self._submitted:
+                self._submitted.wait_for(lambda: self._submitting == 0)
+                futures = list(self._futures)
+            return [future.result() for future in futures]
+        finally:
+            self._executor.shutdown(wait=True)
+    
+    def _take_batches(self, force: bool) -> List[List[str]]:
+        """送信するバッチを取り出す（ロック取得中に呼ぶこと、投入は_submit_allで行う）"""
+        batches = []
+        while len(self._pending) >= self._flush_threshold or (force and self._pending):
+            size = min(self._flush_threshold, len(self._pending))
+            batches.append([self._pending.popleft() for _ in range(size)])
+        if batches:
+            self._submitting += 1
+        return batches
+    
+    def _submit_all(self, batches: List[List[str]]) -> None:
+        """_take_batchesで取り出したバッチをすべて投入"""
+        if not batches:
+            return
+        try:
+            for batch in batches:
+                self._submit(batch)
+        finally:
+            with self._submitted:
+                self._submitting -= 1
+                self._submitted.notify_all()
+    
+    def _submit(self, batch: List[str]) -> None:
+        """バッチをスレッドプールに投入（実行中の数が上限ならブロック）"""
+        self._inflight.acquire()
+        future = self._executor.submit(self._run_batch, batch)
+        with self._lock:
+            self._futures.append(future)
+    
+    def _run_batch(self, batch: List[str]) -> Dict[str, Any]:
+        try:
+            response = self._send_batch(batch)
+        finally:
+            self._inflight.release()
+        
+        if self._on_batch_done:
+            self._on_batch_done(batch, response)
+        return response
 
 
 # ===== S3マネージャークラス =====
@@ -58,7 +276,66 @@ class S3Manager:
             aws_access_key_id=access_key,
             aws_secret_access_key=secret_key
         )
-        self.s3_client = self.session.client('s3')
+        # クライアントはスレッドセーフなため、全スレッドで1つを共有する
+        self.s3_client = self._create_client()
+        # 大きなファイルはパートに分けて並列に送信する
+        # （この設定は共有のTransferManagerを通じて全アップロードに適用される）
+        self.transfer_config = TransferConfig(
+            max_concurrency=AppConstants.TRANSFER_MAX_CONCURRENCY,
+            multipart_threshold=AppConstants.MULTIPART_THRESHOLD,
+            multipart_chunksize=AppConstants.MULTIPART_CHUNKSIZE,
+            use_threads=True
+        )
+        # boto3のTransferConfigは引数で受け取らないため属性で設定する
+        self.transfer_config.max_submission_queue_size = AppConstants.UPLOAD_QUEUE_SIZE
+        # ファイル単位とパート単位の転送を1つのスレッドプールで扱うため、全アップロードで共有する
+        self.transfer_manager = create_transfer_manager(self.s3_client, self.transfer_config)
+        # 少数キーの個別削除用（バッチごとにスレッドを作り直さず使い回す）
+        self._delete_executor = ThreadPoolExecutor(
+            max_workers=AppConstants.DELETE_MAX_WORKERS * AppConstants.SINGLE_DELETE_MAX_KEYS
+        )
+    
+    def _create_client(self, region_name: Optional[str] = None):
+        """接続プールとリトライを調整したS3クライアントを作成"""
+        client_config = Config(
+            max_pool_connections=AppConstants.MAX_POOL_CONNECTIONS,
+            retries={'max_attempts': AppConstants.MAX_RETRY_ATTEMPTS, 'mode': 'adaptive'},
+            tcp_keepalive=True,
+            s3={'addressing_style': 'virtual'}
+        )
+        return self.session.client('s3', region_name=region_name, config=client_config)
+    
+    def close(self) -> None:
+        """未完了の転送を取り消し、TransferManagerと削除用スレッドプールを終了"""
+        self.transfer_manager.shutdown(cancel=True)
+        self._delete_executor.shutdown(wait=False, cancel_futures=True)
+    
+    def use_bucket_region(self, bucket: str) -> None:
+        """
+        バケットのリージョンに合わせてクライアントを作り直す
+        
+        リージョンが異なるとリクエストごとにリダイレクトが発生するため、
+        バケット選択時に一度だけリージョンを確認して接続先を固定する。
+        転送中に呼び出さないこと。
+        
+        Args:
+            bucket: バケット名
+        """
+        try:
+            response = self.s3_client.get_bucket_location(Bucket=bucket)
+        except ClientError:
+            # 権限がない場合などは、リダイレクトに任せて現在のクライアントを使い続ける
+            return
+        
+        location = response.get('LocationConstraint') or 'us-east-1'
+        region = AppConstants.LEGACY_REGIONS.get(location, location)
+        if region == self.s3_client.meta.region_name:
+            return
+        
+        old_manager = self.transfer_manager
+        self.s3_client = self._create_client(region)
+        self.transfer_manager = create_transfer_manager(self.s3_client, self.transfer_config)
+        old_manager.shutdown()
     
     def list_buckets(self) -> List[str]:
         """S3バケットのリストを取得"""
@@ -104,58 +381,318 @@ class S3Manager:
         except ClientError as e:
             raise Exception(f"オブジェクトリストの取得に失敗: {str(e)}")
     
-    def upload_file(self, file_path: str, bucket: str, s3_key: str) -> None:
-        """ファイルをS3にアップロード"""
+    def iter_all_keys(self, bucket: str, prefix: str = "") -> Iterator[str]:
+        """
+        プレフィックス配下のすべてのオブジェクトキーを順に返す
+        
+        Args:
+            bucket: バケット名
+            prefix: プレフィックス
+            
+        Yields:
+            オブジェクトキー
+        """
         try:
-            self.s3_client.upload_file(file_path, bucket, s3_key)
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            pages = paginator.paginate(
+                Bucket=bucket,
+                Prefix=prefix,
+                PaginationConfig={'PageSize': AppConstants.LIST_PAGE_SIZE}
+            )
+            for page in pages:
+                for obj in page.get('Contents', []):
+                    yield obj['Key']
         except ClientError as e:
-            raise Exception(f"アップロード失敗 ({s3_key}): {str(e)}")
+            raise Exception(f"オブジェクトリストの取得に失敗: {str(e)}")
+    
+    def is_uploaded(self, file_path: str, bucket: str, s3_key: str) -> bool:
+        """
+        ローカルファイルと同じ内容のオブジェクトがS3に存在するか確認
+        
+        サイズとETagを比較する。マルチパートアップロードされたオブジェクトは、
+        このアプリのパートサイズで計算したETagと比較する。
+        
+        Args:
+            file_path: ローカルファイルのパス
+            bucket: バケット名
+            s3_key: S3キー
+            
+        Returns:
+            同じ内容のオブジェクトが存在する場合はTrue
+            （確認できない場合はFalseとし、アップロードさせる）
+        """
+        try:
+            head = self.s3_client.head_object(Bucket=bucket, Key=s3_key)
+        except (ClientError, BotoCoreError):
+            # 存在しない場合の404に加え、s3:ListBucket権限がないと403が返るため、
+            # 取得に失敗したオブジェクトはすべて未アップロードとして扱う
+            return False
+        
+        try:
+            size = os.path.getsize(file_path)
+            if head.get('ContentLength') != size:
+                return False
+            
+            etag = head.get('ETag', '').strip('"')
+            if '-' in etag:
+                part_size = self.transfer_config.multipart_chunksize
+                part_count = etag.rsplit('-', 1)[1]
+                if part_count != str(-(-size // part_size)):
+                    return False
+            else:
+                part_size = None
+            
+            return self._calculate_etag(file_path, part_size) == etag
+        except OSError:
+            # 読み込めないファイルの扱いはアップロード処理に任せる
+            return False
     
-    def delete_objects(self, bucket: str, keys: List[str]) -> Dict[str, Any]:
-        """複数のオブジェクトを削除"""
+    @staticmethod
+    def _calculate_etag(file_path: str, part_size: Optional[int]) -> str:
+        """
+        ローカルファイルのETagを計算
+        
+        Args:
+            file_path: ファイルのパス
+            part_size: マルチパートのパートサイズ（単一PUTの場合はNone）
+            
+        Returns:
+            S3と同じ形式のETag（引用符なし）
+        """
+        part_digests = []
+        md5 = hashlib.md5()
+        part_read = 0
+        
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(AppConstants.HASH_READ_SIZE)
+                if not chunk:
+                    break
+                md5.update(chunk)
+                part_read += len(chunk)
+                if part_size and part_read >= part_size:
+                    part_digests.append(md5.digest())
+                    md5 = hashlib.md5()
+                    part_read = 0
+        
+        if not part_size:
+            return md5.hexdigest()
+        
+        if part_read:
+            part_digests.append(md5.digest())
+        return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+    
+    def upload_many(
+        self,
+        bucket: str,
+        pairs: Iterable[Tuple[str, str]],
+        on_file_done: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        複数のファイルをTransferManagerで並列にアップロード
+        
+        pairsは逐次読み出されるため、ジェネレーターを渡せばスキャンと
+        アップロードを並行できる。送信待ちのキューが満杯の間は読み出しが止まる。
+        
+        Args:
+            bucket: バケット名
+            pairs: (ファイルパス, S3キー)のイテラブル
+            on_file_done: 1ファイルの転送が終わるたびに呼ばれるコールバック
+        """
+        errors = []
+        pending = [0]
+        pending_changed = threading.Condition()
+        
+        def on_done(future):
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+            
+            try:
+                if on_file_done:
+                    on_file_done()
+            finally:
+                with pending_changed:
+                    pending[0] -= 1
+                    pending_changed.notify_all()
+        
+        subscribers = [_DoneSubscriber(on_done)]
+        
+        try:
+            # 完了したFutureは保持せず、結果はサブスクライバーで受け取る
+            for file_path, s3_key in pairs:
+                if errors:
+                    break
+                with pending_changed:
+                    pending[0] += 1
+                try:
+                    self.transfer_manager.upload(
+                        file_path, bucket, s3_key, subscribers=subscribers
+                    )
+                except Exception:
+                    with pending_changed:
+                        pending[0] -= 1
+                    raise
+        finally:
+            # 投入済みの転送がすべて終わるまで待機
+            with pending_changed:
+                pending_changed.wait_for(lambda: pending[0] == 0)
+        
+        if errors:
+            error = errors[0]
+            if isinstance(error, ClientError):
+                raise Exception(f"アップロード失敗: {str(error)}")
+            raise error
+    
+    def create_delete_accumulator(
+        self,
+        bucket: str,
+        on_batch_done: Optional[Callable[[List[str], Dict[str, Any]], None]] = None
+    ) -> DeleteAccumulator:
+        """指定バケット向けのDeleteAccumulatorを作成"""
+        return DeleteAccumulator(
+            lambda batch: self._delete_batch(bucket, batch),
+            on_batch_done=on_batch_done
+        )
+    
+    def delete_objects(
+        self,
+        bucket: str,
+        keys: Iterable[str],
+        on_batch_done: Optional[Callable[[List[str]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        複数のオブジェクトを削除（バッチ分割と並列送信はDeleteAccumulatorが行う）
+        
+        keysは逐次読み出されるため、ジェネレーターを渡せば一覧取得と削除を並行できる。
+        
+        Args:
+            bucket: バケット名
+            keys: 削除するキーのイテラブル
+            on_batch_done: 1バッチの削除が終わるたびに呼ばれるコールバック
+            
+        Returns:
+            削除できなかったオブジェクトのエラー情報のリスト
+        """
+        errors: List[Dict[str, Any]] = []
+        
+        def collect_errors(batch: List[str], response: Dict[str, Any]):
+            errors.extend(response.get('Errors', []))
+            if on_batch_done:
+                on_batch_done(batch)
+        
+        with self.create_delete_accumulator(bucket, collect_errors) as accumulator:
+            for key in keys:
+                accumulator.add((key,))
+        
+        return errors
+    
+    def _delete_batch(self, bucket: str, keys: List[str]) -> Dict[str, Any]:
+        """1回のDeleteObjectsリクエストでオブジェクトを削除"""
+        delete_keys = [{'Key': key} for key in keys if key]
+        if not delete_keys:
+            # 空のObjectsはInvalidRequestになるため送信しない
+            return {}
+        
+        if len(delete_keys) <= AppConstants.SINGLE_DELETE_MAX_KEYS:
+            # 少数なら接続を再利用できるDeleteObjectを並列に送る
+            return self._delete_each(bucket, [item['Key'] for item in delete_keys])
+        
         try:
-            delete_keys = [{'Key': key} for key in keys]
             response = self.s3_client.delete_objects(
                 Bucket=bucket,
-                Delete={'Objects': delete_keys}
+                Delete={'Objects': delete_keys, 'Quiet': True}
             )
             return response
         except ClientError as e:
             raise Exception(f"削除失敗: {str(e)}")
+    
+    def _delete_each(self, bucket: str, keys: List[str]) -> Dict[str, Any]:
+        """
+        DeleteObjectで1件ずつ並列に削除
+        
+        Returns:
+            DeleteObjectsと同じ形式の{'Deleted': [...], 'Errors': [...]}
+        """
+        def delete_one(key: str) -> Dict[str, Any]:
+            try:
+                self.s3_client.delete_object(Bucket=bucket, Key=key)
+                return {'Key': key}
+            except ClientError as e:
+                error = e.response.get('Error', {})
+                return {
+                    'Key': key,
+                    'Code': error.get('Code', ''),
+                    'Message': error.get('Message', str(e))
+                }
+        
+        results = list(self._delete_executor.map(delete_one, keys))
+        
+        return {
+            'Deleted': [r for r in results if 'Code' not in r],
+            'Errors': [r for r in results if 'Code' in r]
+        }
 
 
 # ===== AWS認証情報マネージャー =====
+@functools.lru_cache(maxsize=1)
+def _load_credentials(
+    path: str,
+    mtime_ns: int
+) -> Tuple[Tuple[str, ...], Dict[str, Tuple[str, str]]]:
+    """
+    認証情報ファイルを解析（パスと更新時刻が同じ間は結果を再利用）
+    
+    Args:
+        path: 認証情報ファイルのパス
+        mtime_ns: ファイルの更新時刻（キャッシュのキーとしてのみ使用）
+        
+    Returns:
+        (プロファイル名のタプル, {プロファイル名: (アクセスキー, シークレットキー)})
+    """
+    # 値をそのまま扱い、重複したセクションやキーは後勝ちで読み込む
+    config = ConfigParser(interpolation=None, strict=False)
+    try:
+        config.read(path, encoding='utf-8')
+    except ConfigParserError:
+        # 形式が壊れている場合はプロファイルなしとして扱う
+        return (), {}
+    
+    profiles = tuple(config.sections())
+    credentials = {
+        profile: (
+            config[profile].get('aws_access_key_id', ''),
+            config[profile].get('aws_secret_access_key', '')
+        )
+        for profile in profiles
+    }
+    return profiles, credentials
+
+
 class AWSCredentialsManager:
     """AWS認証情報を管理するクラス"""
     
-    @staticmethod
-    def load_profiles() -> List[str]:
+    def __init__(self):
+        self.credentials_path = os.path.join(os.path.expanduser('~'), '.aws', 'credentials')
+    
+    def _load(self) -> Tuple[Tuple[str, ...], Dict[str, Tuple[str, str]]]:
+        """認証情報を取得（ファイルが更新されたときだけ読み直す）"""
+        try:
+            mtime_ns = os.stat(self.credentials_path).st_mtime_ns
+        except OSError:
+            return (), {}
+        return _load_credentials(self.credentials_path, mtime_ns)
+    
+    def load_profiles(self) -> List[str]:
         """AWS CLIのプロファイルリストを取得"""
-        credentials_path = os.path.join(os.path.expanduser('~'), '.aws', 'credentials')
-        profiles = []
-        
-        if os.path.exists(credentials_path):
-            with open(credentials_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('[') and line.endswith(']'):
-                        profiles.append(line[1:-1])
-        
-        return profiles
+        profiles, _ = self._load()
+        return list(profiles)
     
-    @staticmethod
-    def get_credentials(profile: str) -> Tuple[str, str]:
+    def get_credentials(self, profile: str) -> Tuple[str, str]:
         """指定されたプロファイルの認証情報を取得"""
-        credentials_path = os.path.join(os.path.expanduser('~'), '.aws', 'credentials')
-        config = ConfigParser()
-        config.read(credentials_path, encoding='utf-8')
-        
-        if profile in config:
-            access_key = config[profile].get('aws_access_key_id', '')
-            secret_key = config[profile].get('aws_secret_access_key', '')
-            return access_key, secret_key
-        
-        return '', ''
+        _, credentials = self._load()
+        return credentials.get(profile, ('', ''))
 
 
 # ===== UIコンポーネント =====
@@ -197,6 +734,14 @@ class S3UploadAndDeleteApp:
         self.s3_manager: Optional[S3Manager] = None
         self.credentials_manager = AWSCredentialsManager()
         
+        # S3操作は共有スレッドプールで実行し、専用スレッドのイベントループで束ねる
+        self._executor = ThreadPoolExecutor(max_workers=AppConstants.APP_MAX_WORKERS)
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        # ウィンドウを閉じたら実行中のスキャンや削除を打ち切る
+        self._closing = threading.Event()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        
         self._setup_window()
         self._setup_styles()
         self._show_login_screen()
@@ -252,6 +797,56 @@ class S3UploadAndDeleteApp:
             font=AppConstants.FONT_NORMAL,
             padding=(15, 8)
         )
+        
+        # チェックリスト（削除ダイアログ）スタイル
+        style.configure(
+            "Checklist.Treeview",
+            font=AppConstants.FONT_NORMAL,
+            background=AppConstants.COLOR_WHITE,
+            fieldbackground=AppConstants.COLOR_WHITE,
+            rowheight=24
+        )
+    
+    # ===== バックグラウンド処理 =====
+    
+    def _run_async(
+        self,
+        coro: Awaitable[Any],
+        on_done: Callable[[Any, Optional[Exception]], None]
+    ) -> Future:
+        """
+        コルーチンをバックグラウンドのイベントループで実行
+        
+        Args:
+            coro: 実行するコルーチン
+            on_done: (結果, 例外)を受け取る完了時のコールバック（メインスレッドで実行）
+            
+        Returns:
+            キャンセルに使用できるFuture
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        
+        def callback(f: Future):
+            if f.cancelled():
+                return
+            error = f.exception()
+            self.root.after_idle(on_done, None if error else f.result(), error)
+        
+        future.add_done_callback(callback)
+        return future
+    
+    async def _in_executor(self, func: Callable[..., Any], *args: Any) -> Any:
+        """ブロッキングする処理を共有スレッドプールで実行"""
+        return await self._loop.run_in_executor(self._executor, func, *args)
+    
+    def _on_close(self) -> None:
+        """ウィンドウを閉じる際に実行中の処理を打ち切り、未実行の処理を破棄して終了"""
+        self._closing.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.s3_manager is not None:
+            self.s3_manager.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self.root.destroy()
     
     # ===== ログイン画面 =====
     
@@ -338,13 +933,21 @@ class S3UploadAndDeleteApp:
         self.secret_key_entry.grid(row=5, column=0, pady=(0, 25), sticky="ew")
         
         # ログインボタン
-        login_btn = HoverButton(
+        self.login_btn = HoverButton(
             form_frame,
             text="ログイン",
             command=self._handle_login,
             style="Primary.TButton"
         )
-        login_btn.grid(row=6, column=0, pady=(0, 20))
+        self.login_btn.grid(row=6, column=0, pady=(0, 20))
+        
+        # 接続テスト中のプログレスバー（ログイン時のみ表示）
+        self.login_progress = ttk.Progressbar(
+            form_frame,
+            orient="horizontal",
+            length=300,
+            mode="indeterminate"
+        )
         
         # 初期プロファイル選択
         if profiles:
@@ -371,20 +974,55 @@ class S3UploadAndDeleteApp:
             messagebox.showerror("エラー", "アクセスキーとシークレットキーを入力してください")
             return
         
-        try:
-            self.s3_manager = S3Manager(access_key, secret_key)
-            # 接続テスト
-            self.s3_manager.list_buckets()
-            
-            self.login_frame.destroy()
-            self._show_main_screen()
-        except Exception as e:
-            messagebox.showerror("認証エラー", f"ログインに失敗しました:\n{str(e)}")
+        # 接続テストは時間がかかることがあるため、バックグラウンドで実行
+        self.login_btn['state'] = 'disabled'
+        self.login_progress.grid(row=7, column=0, pady=(0, 20))
+        self.login_progress.start(10)
+        
+        self._run_async(
+            self._in_executor(self._check_login, access_key, secret_key),
+            self._login_done
+        )
+    
+    def _check_login(self, access_key: str, secret_key: str) -> Tuple[S3Manager, List[str]]:
+        """
+        接続テストを実行（ワーカースレッドで実行し、Tkには触れない）
+        
+        Returns:
+            (S3マネージャー, バケット名のリスト)
+        """
+        s3_manager = S3Manager(access_key, secret_key)
+        # 接続テストの結果はメイン画面のバケット一覧にそのまま使う
+        bucket_names = s3_manager.list_buckets()
+        return s3_manager, bucket_names
+    
+    def _login_done(
+        self,
+        result: Optional[Tuple[S3Manager, List[str]]],
+        error: Optional[Exception]
+    ) -> None:
+        """接続テストの結果を反映（メインスレッドで実行）"""
+        self.login_progress.stop()
+        self.login_progress.grid_remove()
+        
+        if error is not None:
+            self.login_btn['state'] = 'normal'
+            messagebox.showerror("認証エラー", f"ログインに失敗しました:\n{str(error)}")
+            return
+        
+        self.s3_manager, bucket_names = result
+        self.login_frame.destroy()
+        self._show_main_screen(bucket_names)
     
     # ===== メイン画面 =====
     
-    def _show_main_screen(self) -> None:
-        """メイン画面を表示"""
+    def _show_main_screen(self, bucket_names: List[str]) -> None:
+        """
+        メイン画面を表示
+        
+        Args:
+            bucket_names: バケット名のリスト
+        """
         self.main_frame = ttk.Frame(self.root)
         self.main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=30)
         
@@ -415,7 +1053,6 @@ class S3UploadAndDeleteApp:
         ).grid(row=0, column=0, sticky="w", pady=(0, 5))
         
         self.bucket_var = tk.StringVar()
-        bucket_names = self.s3_manager.list_buckets()
         
         self.bucket_combo = ttk.Combobox(
             form_frame,
@@ -426,6 +1063,7 @@ class S3UploadAndDeleteApp:
             state="readonly"
         )
         self.bucket_combo.grid(row=1, column=0, pady=(0, 20), sticky="ew")
+        self.bucket_combo.bind("<<ComboboxSelected>>", self._on_bucket_selected)
         
         # プレフィックス
         ttk.Label(
@@ -490,6 +1128,15 @@ class S3UploadAndDeleteApp:
         )
         self.progress_label.pack(padx=30, pady=(0, 30))
     
+    def _on_bucket_selected(self, event=None) -> None:
+        """バケット選択時にクライアントの接続先リージョンを合わせる"""
+        self._disable_buttons()
+        self._run_async(
+            self._in_executor(self.s3_manager.use_bucket_region, self.bucket_var.get()),
+            # リージョンを固定できなくてもリダイレクトで操作は続けられるため、結果は問わない
+            lambda result, error: self._enable_buttons()
+        )
+    
     # ===== アップロード処理 =====
     
     def _handle_upload(self) -> None:
@@ -505,30 +1152,36 @@ class S3UploadAndDeleteApp:
         
         self._disable_buttons()
         
-        def upload_thread():
-            try:
-                total = len(file_paths)
-                self.progress["maximum"] = total
-                
-                for i, file_path in enumerate(file_paths, 1):
-                    filename = os.path.basename(file_path)
-                    s3_key = self._get_s3_key(filename)
-                    
-                    self.s3_manager.upload_file(file_path, bucket, s3_key)
-                    
-                    self.progress["value"] = i
-                    self.progress_label.config(text=f"アップロード中: {i}/{total} 完了")
-                    self.root.update_idletasks()
-                
+        # プレフィックスはファイルごとに読み直さず、ここで一度だけ正規化する
+        prefix = self._get_normalized_prefix()
+        
+        total = len(file_paths)
+        counter = ProgressCounter(total)
+        self.progress["maximum"] = total
+        
+        def render(done: int, total: Optional[int]):
+            self.progress["value"] = done
+            self.progress_label.config(text=f"アップロード中: {done}/{total} 完了")
+        
+        stop_refresh = self._start_progress_refresh(counter, render)
+        
+        def finish(result: Any, error: Optional[Exception]):
+            """完了時の処理（メインスレッドで実行）"""
+            stop_refresh()
+            if error is None:
                 self.progress_label.config(text="✓ アップロード完了!")
                 messagebox.showinfo("完了", f"{total}個のファイルをアップロードしました")
-            except Exception as e:
-                messagebox.showerror("エラー", f"アップロード中にエラーが発生:\n{str(e)}")
-            finally:
-                self._enable_buttons()
-                self.progress["value"] = 0
-        
-        threading.Thread(target=upload_thread, daemon=True).start()
+            else:
+                messagebox.showerror("エラー", f"アップロード中にエラーが発生:\n{str(error)}")
+            self._enable_buttons()
+            self.progress["value"] = 0
+        
+        # ファイル単位とパート単位の並列数はTransferManager側でまとめて制限する
+        pairs = [(file_path, prefix + os.path.basename(file_path)) for file_path in file_paths]
+        self._run_async(
+            self._in_executor(self.s3_manager.upload_many, bucket, pairs, counter.add),
+            finish
+        )
     
     def _handle_directory_upload(self) -> None:
         """ディレクトリアップロードの処理"""
@@ -543,85 +1196,115 @@ class S3UploadAndDeleteApp:
         
         self._disable_buttons()
         
-        def upload_thread():
-            try:
-                # ディレクトリをスキャン
-                self.progress_label.config(text="ディレクトリをスキャン中...")
-                self.root.update_idletasks()
-                
-                file_list = self._scan_directory(directory_path)
-                
-                if not file_list:
-                    messagebox.showinfo("情報", "アップロードするファイルが見つかりませんでした")
-                    return
-                
-                total = len(file_list)
-                self.progress["maximum"] = total
-                
-                # 各ファイルをアップロード
-                for i, (file_path, relative_path) in enumerate(file_list, 1):
-                    s3_key = self._get_s3_key_for_directory(relative_path)
-                    
-                    self.s3_manager.upload_file(file_path, bucket, s3_key)
-                    
-                    self.progress["value"] = i
-                    self.progress_label.config(
-                        text=f"アップロード中: {i}/{total} - {relative_path}"
-                    )
-                    self.root.update_idletasks()
-                
-                self.progress_label.config(text="✓ ディレクトリのアップロード完了!")
-                messagebox.showinfo(
-                    "完了",
-                    f"ディレクトリから{total}個のファイルをアップロードしました"
-                )
-            except Exception as e:
-                messagebox.showerror("エラー", f"アップロード中にエラーが発生:\n{str(e)}")
-            finally:
-                self._enable_buttons()
-                self.progress["value"] = 0
+        # 総数はスキャン完了まで不明なため、それまではインジケーター表示
+        self.progress.configure(mode="indeterminate")
+        self.progress.start(10)
+        self.progress_label.config(text="ディレクトリをスキャン中...")
         
-        threading.Thread(target=upload_thread, daemon=True).start()
-    
-    def _scan_directory(self, directory_path: str) -> List[Tuple[str, str]]:
-        """
-        ディレクトリを再帰的にスキャンしてファイルリストを取得
+        prefix = self._get_normalized_prefix()
+        counter = ProgressCounter()
         
-        Args:
-            directory_path: スキャンするディレクトリのパス
+        def render(done: int, total: Optional[int]):
+            if total is None:
+                self.progress_label.config(text=f"アップロード中: {done} 完了（スキャン中）")
+                return
             
-        Returns:
-            [(ファイルの絶対パス, ベースディレクトリからの相対パス), ...]のリスト
-        """
-        file_list = []
-        
-        for root, dirs, files in os.walk(directory_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                # ベースディレクトリからの相対パスを計算
-                relative_path = os.path.relpath(file_path, directory_path)
-                # Windowsのパス区切り文字をS3用のスラッシュに変換
-                relative_path = relative_path.replace('\\', '/')
-                file_list.append((file_path, relative_path))
+            # スキャン完了後は確定表示へ切り替え
+            if str(self.progress["mode"]) == "indeterminate":
+                self.progress.stop()
+                self.progress.configure(mode="determinate", maximum=max(total, 1))
+            self.progress["value"] = done
+            self.progress_label.config(text=f"アップロード中: {done}/{total} 完了")
+        
+        stop_refresh = self._start_progress_refresh(counter, render)
+        
+        skipped = [0]
+        
+        def filter_uploaded(batch: List[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+            """S3に同じ内容が存在するファイルを除外（HEADは共有スレッドプールで並列実行）"""
+            results = self._executor.map(
+                lambda pair: self.s3_manager.is_uploaded(pair[0], bucket, pair[1]),
+                batch
+            )
+            for pair, uploaded in zip(batch, results):
+                if uploaded:
+                    skipped[0] += 1
+                    counter.add()
+                else:
+                    yield pair
+        
+        def scan():
+            """スキャン結果を(ファイルパス, S3キー)として逐次返す"""
+            count = 0
+            batch = []
+            for file_path, relative_path in self._scan_directory(directory_path):
+                count += 1
+                batch.append((file_path, prefix + relative_path))
+                if len(batch) >= AppConstants.HEAD_CHECK_BATCH_SIZE:
+                    yield from filter_uploaded(batch)
+                    batch = []
+            
+            counter.set_total(count)
+            yield from filter_uploaded(batch)
         
-        return file_list
+        def finish(result: Any, error: Optional[Exception]):
+            """完了時の処理（メインスレッドで実行）"""
+            stop_refresh()
+            _, total = counter.snapshot()
+            
+            if error is not None:
+                messagebox.showerror("エラー", f"アップロード中にエラーが発生:\n{str(error)}")
+            elif not total:
+                self.progress_label.config(text="")
+                messagebox.showinfo("情報", "アップロードするファイルが見つかりませんでした")
+            else:
+                self.progress_label.config(text="✓ ディレクトリのアップロード完了!")
+                message = f"ディレクトリから{total - skipped[0]}個のファイルをアップロードしました"
+                if skipped[0]:
+                    message += f"\n（変更のない{skipped[0]}個のファイルはスキップしました）"
+                messagebox.showinfo("完了", message)
+            
+            self.progress.stop()
+            self.progress.configure(mode="determinate", value=0)
+            self._enable_buttons()
+        
+        # スキャンしながらTransferManagerへ順次投入
+        self._run_async(
+            self._in_executor(self.s3_manager.upload_many, bucket, scan(), counter.add),
+            finish
+        )
     
-    def _get_s3_key_for_directory(self, relative_path: str) -> str:
+    def _scan_directory(self, directory_path: str) -> Iterator[Tuple[str, str]]:
         """
-        ディレクトリアップロード用のS3キーを生成
+        ディレクトリを再帰的にスキャンしてファイルを順に返す
         
         Args:
-            relative_path: ベースディレクトリからの相対パス
+            directory_path: スキャンするディレクトリのパス
             
-        Returns:
-            S3キー（prefixを含む）
+        Yields:
+            (ファイルの絶対パス, ベースディレクトリからの相対パス)
         """
-        prefix = self.prefix_var.get().strip()
-        if prefix:
-            if not prefix.endswith('/'):
-                prefix += '/'
-            return f"{prefix}{relative_path}"
-        return relative_path
+        base_len = len(directory_path)
+        stack = [directory_path]
+        
+        while stack and not self._closing.is_set():
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                # os.walkと同様、読み取れないディレクトリは読み飛ばす
+                continue
+            
+            with entries:
+                for entry in entries:
+                    if self._closing.is_set():
+                        return
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        # ベースディレクトリからの相対パスを計算し、
+                        # Windowsのパス区切り文字をS3用のスラッシュに変換
+                        relative_path = entry.path[base_len:].lstrip('\\/').replace('\\', '/')
+                        yield entry.path, relative_path
     
     # ===== 削除処理 =====
     
@@ -634,18 +1317,31 @@ class S3UploadAndDeleteApp:
         
         prefix = self.prefix_var.get().strip()
         
-        try:
-            objects, next_token = self.s3_manager.list_objects(
-                bucket, prefix, AppConstants.MAX_KEYS_PER_PAGE
-            )
+        def on_listed(
+            result: Optional[Tuple[List[str], Optional[str]]],
+            error: Optional[Exception]
+        ):
+            """一覧取得の結果を反映（メインスレッドで実行）"""
+            self._enable_buttons()
+            if error is not None:
+                messagebox.showerror("エラー", f"オブジェクトリストの取得に失敗:\n{str(error)}")
+                return
             
+            objects, next_token = result
             if not objects:
                 messagebox.showinfo("情報", "指定されたプレフィックスにオブジェクトが見つかりません")
                 return
             
             self._show_delete_dialog(bucket, prefix, objects, next_token)
-        except Exception as e:
-            messagebox.showerror("エラー", f"オブジェクトリストの取得に失敗:\n{str(e)}")
+        
+        # 最初の1000件の取得結果を、存在確認とダイアログの1ページ目の両方に使う
+        self._disable_buttons()
+        self._run_async(
+            self._in_executor(
+                self.s3_manager.list_objects, bucket, prefix, AppConstants.LIST_PAGE_SIZE
+            ),
+            on_listed
+        )
     
     def _show_delete_dialog(
         self,
@@ -661,10 +1357,13 @@ class S3UploadAndDeleteApp:
         dialog.configure(bg=AppConstants.COLOR_BG_LIGHT)
         
         # 状態管理
-        pages = [[obj, False] for obj in initial_objects]  # [key, checked]
-        all_pages = [pages]
+        all_keys = list(initial_objects)  # 取得済みのキー（1画面はMAX_KEYS_PER_PAGE件）
+        selected = set()  # チェックされたオブジェクトキー
         current_page = [0]
+        page_size = AppConstants.MAX_KEYS_PER_PAGE
         continuation_token = [initial_token]
+        page_lock = threading.Lock()
+        prefetching = [False]
         
         # タイトル
         title_frame = ttk.Frame(dialog, style="Card.TFrame")
@@ -685,70 +1384,119 @@ class S3UploadAndDeleteApp:
         )
         page_label.pack(pady=(0, 10))
         
-        # チェックボックスフレーム（スクロール可能）
-        checkbox_container = ttk.Frame(dialog, relief="solid", borderwidth=1)
-        checkbox_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
-        
-        canvas = tk.Canvas(checkbox_container, bg=AppConstants.COLOR_WHITE)
-        scrollbar = ttk.Scrollbar(checkbox_container, orient="vertical", command=canvas.yview)
-        checkbox_frame = ttk.Frame(canvas, style="Card.TFrame")
+        # チェックリスト（Treeviewは表示行のみ描画し、行ごとのウィジェットを作らない）
+        tree_container = ttk.Frame(dialog, relief="solid", borderwidth=1)
+        tree_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
-        checkbox_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        tree = ttk.Treeview(
+            tree_container,
+            columns=("key",),
+            show="tree headings",
+            selectmode="none",
+            style="Checklist.Treeview"
         )
+        tree.heading("#0", text="")
+        tree.heading("key", text="オブジェクトキー", anchor="w")
+        tree.column("#0", width=40, stretch=False, anchor="center")
+        tree.column("key", anchor="w")
         
-        canvas.create_window((0, 0), window=checkbox_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(tree_container, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
         
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        def current_keys() -> List[str]:
+            """表示中の画面のキーを取得"""
+            start = current_page[0] * page_size
+            with page_lock:
+                return all_keys[start:start + page_size]
+        
         def update_checkboxes():
-            """チェックボックスを更新"""
-            for widget in checkbox_frame.winfo_children():
-                widget.destroy()
+            """チェックリストを更新"""
+            tree.delete(*tree.get_children())
             
-            current_data = all_pages[current_page[0]]
+            for i, obj_key in enumerate(current_keys()):
+                mark = "☑" if obj_key in selected else "☐"
+                tree.insert("", "end", iid=str(i), text=mark, values=(obj_key,))
             
-            for i, (obj_key, checked) in enumerate(current_data):
-                var = tk.BooleanVar(value=checked)
-                
-                cb = ttk.Checkbutton(
-                    checkbox_frame,
-                    text=obj_key,
-                    variable=var,
-                    style="Card.TCheckbutton"
-                )
-                cb.pack(anchor="w", padx=10, pady=2)
-                
-                # チェック状態の更新
-                var.trace_add(
-                    "write",
-                    lambda *args, idx=i, v=var: update_check_state(idx, v.get())
+            with page_lock:
+                page_count = max(1, -(-len(all_keys) // page_size))
+            page_label.config(text=f"ページ {current_page[0] + 1} / {page_count}")
+            start_prefetch()
+        
+        def start_prefetch():
+            """取得済みの最後の1000件を表示し始めたら、次の1000件を先読み"""
+            with page_lock:
+                remaining = len(all_keys) - (current_page[0] + 1) * page_size
+                if (
+                    prefetching[0]
+                    or not continuation_token[0]
+                    or remaining >= AppConstants.LIST_PAGE_SIZE
+                ):
+                    return
+                prefetching[0] = True
+                token = continuation_token[0]
+            
+            self._executor.submit(prefetch, token)
+        
+        def prefetch(token: str):
+            """次の1000件を取得（ワーカースレッドで実行し、Tkには触れない）"""
+            try:
+                objects, next_token = self.s3_manager.list_objects(
+                    bucket, prefix, AppConstants.LIST_PAGE_SIZE, token
                 )
+                with page_lock:
+                    all_keys.extend(objects)
+                    continuation_token[0] = next_token
+            except Exception:
+                # 失敗時は「次のページ」操作時の通常の読み込みに任せる
+                pass
+            finally:
+                with page_lock:
+                    prefetching[0] = False
+        
+        def toggle_check(event):
+            """クリックされた行のチェック状態を切り替え"""
+            row = tree.identify_row(event.y)
+            if not row:
+                return
             
-            page_label.config(text=f"ページ {current_page[0] + 1} / {len(all_pages)}")
+            obj_key = current_keys()[int(row)]
+            if obj_key in selected:
+                selected.discard(obj_key)
+                tree.item(row, text="☐")
+            else:
+                selected.add(obj_key)
+                tree.item(row, text="☑")
         
-        def update_check_state(index: int, checked: bool):
-            """チェック状態を保存"""
-            all_pages[current_page[0]][index][1] = checked
+        tree.bind("<Button-1>", toggle_check)
         
         def load_next_page():
             """次のページを読み込み"""
-            if current_page[0] + 1 < len(all_pages):
+            with page_lock:
+                has_next = (current_page[0] + 1) * page_size < len(all_keys)
+                in_flight = prefetching[0]
+                token = continuation_token[0]
+            
+            if has_next:
                 current_page[0] += 1
                 update_checkboxes()
-            elif continuation_token[0]:
+            elif in_flight:
+                # 先読みの完了を待ってから再試行
+                dialog.after(50, load_next_page)
+            elif token:
                 try:
                     objects, next_token = self.s3_manager.list_objects(
-                        bucket, prefix, AppConstants.MAX_KEYS_PER_PAGE, continuation_token[0]
+                        bucket, prefix, AppConstants.LIST_PAGE_SIZE, token
                     )
                     
-                    new_page = [[obj, False] for obj in objects]
-                    all_pages.append(new_page)
-                    continuation_token[0] = next_token
-                    current_page[0] += 1
+                    with page_lock:
+                        all_keys.extend(objects)
+                        continuation_token[0] = next_token
+                        has_next = (current_page[0] + 1) * page_size < len(all_keys)
+                    if has_next:
+                        current_page[0] += 1
                     update_checkboxes()
                 except Exception as e:
                     messagebox.showerror("エラー", f"次のページの読み込みに失敗:\n{str(e)}")
@@ -761,10 +1509,8 @@ class S3UploadAndDeleteApp:
         
         def delete_selected():
             """選択されたファイルを削除"""
-            selected_keys = [
-                obj_key for page in all_pages
-                for obj_key, checked in page if checked
-            ]
+            with page_lock:
+                selected_keys = [obj_key for obj_key in all_keys if obj_key in selected]
             
             if not selected_keys:
                 messagebox.showwarning("警告", "削除するファイルを選択してください")
@@ -837,11 +1583,19 @@ class S3UploadAndDeleteApp:
         prefix: str = ""
     ) -> None:
         """削除を実行"""
+        # 同じキーが複数ページに現れた場合に備え、順序を保ったまま重複を除く
+        selected_keys = list(dict.fromkeys(selected_keys))
+        
         progress_dialog = tk.Toplevel(parent_dialog)
         progress_dialog.title("削除中")
         progress_dialog.geometry("400x200")
         progress_dialog.configure(bg=AppConstants.COLOR_BG_LIGHT)
         
+        # 削除中はダイアログを閉じられないようにし、削除の二重実行を防ぐ
+        progress_dialog.transient(parent_dialog)
+        progress_dialog.wait_visibility()
+        progress_dialog.grab_set()
+        
         # プログレスバー
         ttk.Label(
             progress_dialog,
@@ -874,68 +1628,121 @@ class S3UploadAndDeleteApp:
         ok_button.pack(pady=10)
         ok_button['state'] = 'disabled'
         
-        def delete_thread():
-            try:
+        if delete_all:
+            counter = ProgressCounter()
+            progress_bar['maximum'] = 1000  # 進捗表示用の仮の最大値
+            
+            def render(done: int, total: Optional[int]):
+                status_label.config(text=f"削除済み: {done} ファイル")
+                batches = done // AppConstants.DELETE_BATCH_SIZE
+                progress_bar['value'] = min(batches * 10, 990)
+        else:
+            counter = ProgressCounter(len(selected_keys))
+            progress_bar['maximum'] = len(selected_keys)
+            
+            def render(done: int, total: Optional[int]):
+                progress_bar['value'] = done
+                status_label.config(text=f"削除済み: {done}/{total}")
+        
+        stop_refresh = self._start_progress_refresh(counter, render)
+        
+        finished = [False]
+        cancel = threading.Event()
+        
+        def finish(errors: Optional[List[Dict[str, Any]]], error: Optional[Exception]):
+            """完了時の処理（メインスレッドで実行）"""
+            finished[0] = True
+            stop_refresh()
+            self._enable_buttons()
+            if cancel.is_set() and error is None:
+                done, _ = counter.snapshot()
+                self._close_progress_dialog(parent_dialog, progress_dialog)
+                messagebox.showinfo("情報", f"削除を中止しました（{done}個のファイルを削除済み）")
+                return
+            if error is None and errors:
+                status_label.config(text=f"⚠ {len(errors)}個のファイルを削除できませんでした")
+                details = "\n".join(
+                    f"{item.get('Key', '')}: {item.get('Code', '')}"
+                    for item in errors[:AppConstants.MAX_ERRORS_SHOWN]
+                )
+                if len(errors) > AppConstants.MAX_ERRORS_SHOWN:
+                    details += f"\n...ほか{len(errors) - AppConstants.MAX_ERRORS_SHOWN}件"
+                messagebox.showwarning(
+                    "警告",
+                    f"{len(errors)}個のファイルを削除できませんでした:\n{details}"
+                )
+            elif error is None:
                 if delete_all:
-                    # すべて削除
-                    self._delete_all_with_prefix(
-                        bucket, prefix, progress_bar, status_label
-                    )
-                else:
-                    # 選択されたファイルを削除
-                    total = len(selected_keys)
-                    progress_bar['maximum'] = total
-                    
-                    # バッチで削除
-                    for i in range(0, total, AppConstants.DELETE_BATCH_SIZE):
-                        batch = selected_keys[i:i + AppConstants.DELETE_BATCH_SIZE]
-                        self.s3_manager.delete_objects(bucket, batch)
-                        
-                        progress_bar['value'] = min(i + AppConstants.DELETE_BATCH_SIZE, total)
-                        status_label.config(
-                            text=f"削除済み: {min(i + AppConstants.DELETE_BATCH_SIZE, total)}/{total}"
-                        )
-                        progress_dialog.update_idletasks()
-                
+                    progress_bar['value'] = 1000
                 status_label.config(text="✓ 削除完了!")
-                ok_button['state'] = 'normal'
-            except Exception as e:
-                messagebox.showerror("エラー", f"削除中にエラーが発生:\n{str(e)}")
-                ok_button['state'] = 'normal'
+            else:
+                messagebox.showerror("エラー", f"削除中にエラーが発生:\n{str(error)}")
+            ok_button['state'] = 'normal'
+        
+        if delete_all:
+            # すべて削除
+            job = self._in_executor(
+                self._delete_all_with_prefix, bucket, prefix, counter, cancel
+            )
+        else:
+            # 選択されたファイルを削除
+            job = self._in_executor(self._delete_keys, bucket, selected_keys, counter, cancel)
         
-        threading.Thread(target=delete_thread, daemon=True).start()
+        self._disable_buttons()
+        self._run_async(job, finish)
+        
+        def on_close():
+            # 削除中に閉じられた場合は中止を要求し、送信中のバッチが終わってから閉じる
+            if finished[0]:
+                self._close_progress_dialog(parent_dialog, progress_dialog)
+            elif not cancel.is_set():
+                cancel.set()
+                status_label.config(text="削除を中止しています...")
+        
+        progress_dialog.protocol("WM_DELETE_WINDOW", on_close)
     
-    def _delete_all_with_prefix(
+    def _delete_keys(
         self,
         bucket: str,
-        prefix: str,
-        progress_bar: ttk.Progressbar,
-        status_label: ttk.Label
-    ) -> None:
-        """プレフィックス配下のすべてのオブジェクトを削除"""
-        total_deleted = 0
-        continuation_token = None
+        keys: Iterable[str],
+        counter: ProgressCounter,
+        cancel: threading.Event
+    ) -> List[Dict[str, Any]]:
+        """
+        オブジェクトを削除し、進捗をカウンターに反映
         
-        progress_bar['maximum'] = 1000  # 進捗表示用の仮の最大値
+        Args:
+            bucket: バケット名
+            keys: 削除するキーのイテラブル
+            counter: 進捗カウンター
+            cancel: セットされると以降のキーを送信せずに終了するイベント
         
-        while True:
-            objects, continuation_token = self.s3_manager.list_objects(
-                bucket, prefix, AppConstants.DELETE_BATCH_SIZE, continuation_token
-            )
-            
-            if not objects:
-                break
-            
-            self.s3_manager.delete_objects(bucket, objects)
-            total_deleted += len(objects)
-            
-            status_label.config(text=f"削除済み: {total_deleted} ファイル")
-            progress_bar['value'] = min(progress_bar['value'] + 10, 990)
-            
-            if not continuation_token:
-                break
+        Returns:
+            削除できなかったオブジェクトのエラー情報のリスト
+        """
+        def until_closing() -> Iterator[str]:
+            """中止されるか、ウィンドウが閉じられるまでキーを渡す"""
+            for key in keys:
+                if cancel.is_set() or self._closing.is_set():
+                    return
+                yield key
         
-        progress_bar['value'] = 1000
+        return self.s3_manager.delete_objects(
+            bucket, until_closing(), lambda batch: counter.add(len(batch))
+        )
+    
+    def _delete_all_with_prefix(
+        self,
+        bucket: str,
+        prefix: str,
+        counter: ProgressCounter,
+        cancel: threading.Event
+    ) -> List[Dict[str, Any]]:
+        """プレフィックス配下のすべてのオブジェクトを削除"""
+        # LISTを続けながら、溜まったキーを並列にDELETEする
+        return self._delete_keys(
+            bucket, self.s3_manager.iter_all_keys(bucket, prefix), counter, cancel
+        )
     
     def _close_progress_dialog(
         self,
@@ -946,23 +1753,66 @@ class S3UploadAndDeleteApp:
         progress_dialog.destroy()
         parent_dialog.destroy()
     
-    def _get_s3_key(self, filename: str) -> str:
-        """ファイル名からS3キーを生成"""
+    def _get_normalized_prefix(self) -> str:
+        """
+        S3キーの先頭に付けるプレフィックスを取得
+        
+        Returns:
+            末尾を'/'に揃えたプレフィックス（未入力の場合は空文字列）
+        """
         prefix = self.prefix_var.get().strip()
         if prefix:
-            if not prefix.endswith('/'):
-                prefix += '/'
-            return f"{prefix}{filename}"
-        return filename
+            return prefix.rstrip('/') + '/'
+        return prefix
+    
+    def _start_progress_refresh(
+        self,
+        counter: ProgressCounter,
+        render: Callable[[int, Optional[int]], None]
+    ) -> Callable[[], None]:
+        """
+        進捗表示の定期更新を開始
+        
+        ワーカースレッドはcounterを更新するだけにし、表示の更新は
+        メインスレッドで一定間隔ごとにまとめて行う。
+        
+        Args:
+            counter: 進捗カウンタ
+            render: (完了数, 総数)を受け取って表示を更新する関数
+            
+        Returns:
+            定期更新を停止する関数（停止時に最新の状態を一度描画する）
+        """
+        after_id = [None]
+        
+        def refresh():
+            try:
+                render(*counter.snapshot())
+            except tk.TclError:
+                # 表示先のウィジェットが閉じられた
+                after_id[0] = None
+                return
+            after_id[0] = self.root.after(AppConstants.PROGRESS_REFRESH_MS, refresh)
+        
+        def stop():
+            if after_id[0] is not None:
+                self.root.after_cancel(after_id[0])
+                after_id[0] = None
+                render(*counter.snapshot())
+        
+        refresh()
+        return stop
     
     def _disable_buttons(self) -> None:
         """ボタンを無効化"""
+        self.bucket_combo['state'] = 'disabled'
         self.upload_btn['state'] = 'disabled'
         self.upload_dir_btn['state'] = 'disabled'
         self.delete_btn['state'] = 'disabled'
     
     def _enable_buttons(self) -> None:
         """ボタンを有効化"""
+        self.bucket_combo['state'] = 'readonly'
         self.upload_btn['state'] = 'normal'
         self.upload_dir_btn['state'] = 'normal'
         self.delete_btn['state'] = 'normal'
@@ -970,6 +1820,7 @@ class S3UploadAndDeleteApp:
 
 # ===== アプリケーションのエントリーポイント =====
 if __name__ == "__main__":
+    _enlarge_http_blocksize(AppConstants.HTTP_BLOCKSIZE)
     root = tk.Tk()
     app = S3UploadAndDeleteApp(root)
     root.mainloop()